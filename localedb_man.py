@@ -12,20 +12,19 @@ import pandas as pd
 import psycopg2
 import psycopg2.extras
 import random as rd
-import re
 import requests
+import struct
 import sys
 import time
-import urllib.request
 
 from abc             import ABC
 from collections     import namedtuple
+from concurrent      import futures
 from glob            import glob
 from ftplib          import FTP
 from pathlib         import Path
 from psycopg2.errors import UniqueViolation
 from sqlalchemy      import create_engine
-from sqlalchemy.exc  import IntegrityError
 
 sys.path.append('/usr/share/localedb/scripts')
 import airtraffic
@@ -51,7 +50,7 @@ class DBI(object):
     """Database interface.
     """
 
-    def __init__(self, pg_host, pg_port, pg_usr, pg_pwd, pg_db, pg_schema_dis, pg_schema_geo, pg_schema_main, pg_schema_pop, pg_schema_vax, pg_schema_health, pg_schema_weather, pg_schema_mobility, cursor_factory=psycopg2.extras.NamedTupleCursor):
+    def __init__(self, pg_host, pg_port, pg_usr, pg_pwd, pg_db, pg_schema_dis, pg_schema_geo, pg_schema_main, pg_schema_pop, pg_schema_vax, pg_schema_health, pg_schema_weather, pg_schema_mobility, cursor_factory=None):
         self.pg_host            = pg_host
         self.pg_port            = pg_port
         self.pg_usr             = pg_usr
@@ -65,14 +64,68 @@ class DBI(object):
         self.pg_schema_health   = pg_schema_health
         self.pg_schema_weather  = pg_schema_weather
         self.pg_schema_mobility = pg_schema_mobility
+        self.cursor_factory     = cursor_factory
 
-        self.conn = psycopg2.connect(host=self.pg_host, port=self.pg_port, user=self.pg_usr, password=self.pg_pwd, database=self.pg_db, cursor_factory=cursor_factory)
+        self.conn = self.connect()
 
     def __del__(self):
         if hasattr(self, 'conn') and self.conn is not None:
             self.conn.close()
             self.conn = None
 
+    def analyze(self, *tbls):
+        """Refreshes the planner statistics of the tables specified (or the entire database) in one statement.
+
+        Unlike VACUUM, ANALYZE only samples the tables and can run inside the current transaction.  It is enough after
+        loads into freshly truncated tables, which leave no dead tuples behind.
+        """
+
+        with self.conn.cursor() as c:
+            c.execute(f'ANALYZE {", ".join(tbls)};')
+        self.conn.commit()
+
+    def connect(self):
+        """Opens a new connection to the database (e.g., for loading data concurrently with 'self.conn').  The caller
+        is responsible for closing it.
+        """
+
+        return psycopg2.connect(host=self.pg_host, port=self.pg_port, user=self.pg_usr, password=self.pg_pwd, database=self.pg_db, cursor_factory=self.cursor_factory)
+
+    def copy_df(self, cursor, df, tbl):
+        """Loads the DataFrame specified into the table specified with a single COPY; columns are matched by name.
+
+        Missing values are written as unquoted empty strings and thus become NULLs.  Floats are written with enough
+        digits to round-trip and without a trailing '.0' so that whole numbers stored as floats (e.g., because of
+        missing values) can be loaded into integer columns.
+        """
+
+        buf = io.StringIO()
+        df.to_csv(buf, index=False, header=False, float_format='%.17g')
+        buf.seek(0)
+        cursor.copy_expert(f"COPY {tbl} ({', '.join(df.columns)}) FROM stdin WITH CSV;", buf)
+
+    def drop_idx_fk(self, cursor, tbl):
+        """Drops the secondary indices and the foreign keys of the table specified (e.g., before bulk loading it) and
+        returns the SQL statements that recreate them.
+
+        Indices backing constraints (e.g., the primary key) are kept.  Rebuilding an index in one sorted pass and
+        validating a foreign key with one join is much faster than maintaining and checking them row by row.
+        """
+
+        cursor.execute('''
+            SELECT format('DROP INDEX %%s;', indexrelid::regclass), pg_get_indexdef(indexrelid) || ';'
+            FROM pg_index i
+            WHERE indrelid = %s::regclass AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = i.indexrelid)
+            UNION ALL
+            SELECT format('ALTER TABLE %%s DROP CONSTRAINT %%I;', conrelid::regclass, conname), format('ALTER TABLE %%s ADD CONSTRAINT %%I %%s;', conrelid::regclass, conname, pg_get_constraintdef(oid))
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype = 'f';
+        ''', [tbl, tbl])
+        sql = cursor.fetchall()
+        if len(sql) > 0:
+            cursor.execute('\n'.join(sql_drop for (sql_drop, _) in sql))
+        return '\n'.join(sql_create for (_, sql_create) in sql)
+
     def is_col(self, col, tbl, schema=None, cursor=None):
         """Does the column specified exist?
 
@@ -89,22 +142,51 @@ class DBI(object):
         ``None``, a temporary table is assumed and its namespace is used automatically.
         """
 
-        if schema is None:
-            if cursor is None:
-                schema = "'public'"
-            else:
-                schema = 'pg_my_temp_schema()'
-        else:
-            schema = f"'{schema}'"
+        if schema is None and cursor is None:
+            schema = 'public'
         if cursor is None:
             cursor = self.conn.cursor()
-        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_schema = {schema} AND table_name = '{tbl}' AND column_name = '{col}');")
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_schema = COALESCE(%s, pg_my_temp_schema()::regnamespace::name) AND table_name = %s AND column_name = %s);',
+            [schema, tbl, col]
+        )
         return cursor.fetchone()[0]
 
-    def vacuum(self, tbl=None, do_full=False):
+    def set_bulk_load(self, cursor, work_mem='256MB', maintenance_work_mem='1GB'):
+        """Relaxes durability and raises memory limits for the remainder of the current transaction.
+
+        With 'synchronous_commit' off, a crash may lose the most recently committed transactions but never leaves the
+        database inconsistent; for an import that merely means it has to be rerun.  The memory limits speed up the
+        sorts, hash aggregates, and index builds that follow bulk loads; a limit that is None is left as configured
+        (e.g., on connections that only COPY).
+        """
+
+        cursor.execute('SET LOCAL synchronous_commit = off;')
+        cursor.execute('SET LOCAL statement_timeout = 0;')
+        if work_mem is not None:
+            cursor.execute("SELECT set_config('work_mem', %s, true);", [work_mem])
+        if maintenance_work_mem is not None:
+            cursor.execute("SELECT set_config('maintenance_work_mem', %s, true);", [maintenance_work_mem])
+
+    def server_cursor(self, name, itersize=10000):
+        """Returns a server-side (named) cursor which fetches the result set in batches of 'itersize' rows as it is
+        being iterated over.
+        """
+
+        c = self.conn.cursor(name=name)
+        c.itersize = itersize
+        return c
+
+    def vacuum(self, *tbls):
+        """Vacuums and analyzes the tables specified (or the entire database) in one statement.
+
+        VACUUM FULL is not offered because it rewrites the table under an exclusive lock while the bulk loads performed
+        here only ever need the dead tuples reclaimed and the planner statistics refreshed.
+        """
+
         self.conn.autocommit = True
         c = self.conn.cursor()
-        c.execute(f'VACUUM (FULL, ANALYZE) {tbl or ""};' if do_full else f'VACUUM ANALYZE {tbl or ""};')
+        c.execute(f'VACUUM ANALYZE {", ".join(tbls)};')
         c.close()
         self.conn.autocommit = False
 
@@ -132,6 +214,48 @@ class FSI(object):
         return self.log
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+def read_county_txt_file(path):
+    """Returns the data lines of a county text file (i.e., all lines but the header) as bytes."""
+
+    with open(path, 'rb') as f:
+        f.readline()
+        txt = f.read()
+    if txt != b'' and not txt.endswith(b'\n'):
+        txt += b'\n'  # terminate the last line so that the next file's first line isn't appended to it
+    return txt
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class ChunkFile(object):
+    """Read-only file-like object that concatenates the bytes objects yielded by the iterable specified.
+
+    Chunks are pulled from the iterable only as they are read which makes this class suitable as the source of a COPY
+    FROM STDIN fed by a producer (e.g., a generator reading files).
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buf    = b''
+        self.pos    = 0  # position in the current chunk (avoids copying the chunk's remainder on every read)
+
+    def read(self, size=-1):
+        if size < 0:
+            ret = self.buf[self.pos:] + b''.join(self.chunks)
+            self.buf, self.pos = b'', 0
+            return ret
+
+        while self.pos >= len(self.buf):
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return b''
+            self.buf, self.pos = chunk, 0
+
+        ret = self.buf[self.pos:self.pos + size]
+        self.pos += len(ret)
+        return ret
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 class Schema(ABC):
     """Database schema manager.
@@ -143,6 +267,46 @@ class Schema(ABC):
         self.dbi = dbi
         self.fsi = fsi
         self.engine = engine
+        self.http = requests.Session()  # keeps the connections alive across downloads (one TCP and TLS handshake per host)
+
+    def download(self, urls):
+        """Downloads the URLs specified concurrently and returns their contents (as bytes) in the same order.
+
+        The downloads are I/O-bound so threads suffice to overlap them.
+        """
+
+        with futures.ThreadPoolExecutor(max_workers=len(urls)) as ex:
+            return list(ex.map(self.download_url, urls))
+
+    def download_url(self, url, fpath=None, max_tries=5, delay=1, timeout=(10, 60)):
+        """Downloads the URL specified and returns its content (as bytes) or, if 'fpath' is specified, streams it to
+        that file in chunks (so that the content is never held in memory) and returns the file's path.
+
+        The download goes through the session shared by all downloads of this object (and thus reuses its connections)
+        and the content is requested compressed (the CSV files compress very well) and decompressed transparently.
+        Rate-limited (HTTP 429), server-side (HTTP 5xx), and connection errors are retried with exponential backoff
+        starting at 'delay' seconds; all other errors and the last failed attempt are raised.  A server that does not
+        accept the connection or stops sending data for longer than the (connect, read) 'timeout' (in seconds) counts
+        as a connection error.
+        """
+
+        for i in range(max_tries):
+            try:
+                with self.http.get(url, stream=fpath is not None, timeout=timeout) as res:
+                    res.raise_for_status()
+                    if fpath is None:
+                        return res.content
+                    with open(fpath, 'wb') as f:  # truncates whatever a failed attempt left behind
+                        for chunk in res.iter_content(chunk_size=1 << 20):
+                            f.write(chunk)
+                    return fpath
+            except requests.HTTPError as e:
+                if i == max_tries - 1 or (e.response.status_code != 429 and e.response.status_code < 500):
+                    raise
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+                if i == max_tries - 1:
+                    raise
+            time.sleep(delay * 2 ** i)
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -196,6 +360,10 @@ class DiseaseSchema(Schema):
 
     URL_NPI_COVID_19_KEYSTONE = 'https://raw.githubusercontent.com/Keystone-Strategy/covid19-intervention-data/master/complete_npis_inherited_policies.csv'
 
+    PG_COPY_BIN_HEADER  = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)  # signature, flags, and header extension length
+    PG_COPY_BIN_TRAILER = struct.pack('>h', -1)
+    PG_EPOCH            = pd.Timestamp('2000-01-01')  # binary-format dates are days since this date
+
     def get_disease_id(self, name='COVID-19'):
         ret = None
         with self.dbi.conn.cursor() as c:
@@ -220,8 +388,11 @@ class DiseaseSchema(Schema):
             disease_id = c.fetchone()[0]
         self.dbi.conn.commit()
 
-        self.load_covid_19_dyn(disease_id)
-        self.load_covid_19_npi(disease_id)
+        with futures.ThreadPoolExecutor(max_workers=1) as ex:
+            data_npi = ex.submit(self.download_url, self.URL_NPI_COVID_19_KEYSTONE)  # downloaded while the disease dynamics are being loaded
+            self.load_covid_19_dyn(disease_id)
+            self.load_covid_19_npi(disease_id, data_npi.result())
+        self.dbi.analyze(f'{self.dbi.pg_schema_dis}.dyn', f'{self.dbi.pg_schema_dis}.npi')
 
     def load_covid_19_clinical(self, state='-', actnow_api_key=None):
         disease_id = self.get_disease_id()
@@ -238,7 +409,7 @@ class DiseaseSchema(Schema):
 
         print(f'Downloading...', end='', flush=True)
         t0 = time.perf_counter()
-        urllib.request.urlretrieve(f'https://api.covidactnow.org/v2/counties.timeseries.csv?apiKey={api_key}', fpath)
+        self.download_url(f'https://api.covidactnow.org/v2/counties.timeseries.csv?apiKey={api_key}', fpath)
         print(f' done ({time.perf_counter() - t0:.0f} s)', flush=True)
 
         # disabling using previously downloaded file for now (should add a 'do_force_download' arg):
@@ -254,150 +425,246 @@ class DiseaseSchema(Schema):
         # else:
         #     print(f'Using existing file: {fpath}')
 
-        # Convert to list:
-        with open(fpath, newline='') as f:
-            reader = csv.reader(f)
-            header = next(reader)
-            if state == '-':
-                rows = [[None if c == '' else c for c in r] for r in reader]
-            else:
-                rows = [[None if c == '' else c for c in r] for r in reader if r[2] == state]
-
-        # (2) Transform:
+        # (2) Transform and (3) Load (rows are streamed from the file to the database):
         print(f'Processing...', end='', flush=True)
         t0 = time.perf_counter()
+        n = 0
 
-        # (2.1) Get 'locale_id' for every row:
-        with self.dbi.conn.cursor() as c:
-            for r in rows:
-                c.execute(f"SELECT id FROM {self.dbi.pg_schema_main}.locale WHERE fips = %s;", [r[4]])
-                locale_id = c.fetchone()
-                r.insert(0, locale_id[0] if locale_id is not None else None)
-        rows = [r for r in rows if r[0] is not None]
+        def get_rows(reader, locales):
+            nonlocal n
+            for r in reader:
+                if state != '-' and r[2] != state:
+                    continue
+                r = [None if v == '' else v for v in r]
 
-        # (3) Load:
-        qry_set = '=%s,'.join(['case_density', 'r0', 'r0_ci90', 'test_n_pos', 'test_n_neg', 'test_r_pos', 'beds_hosp_cap', 'beds_hosp_usage_tot', 'beds_hosp_usage_covid', 'beds_icu_cap', 'beds_icu_usage_tot', 'beds_icu_usage_covid', 'vax_n_init', 'vax_n_done', 'vax_r_init', 'vax_r_done']) + '=%s'
-        qry = f'UPDATE {self.dbi.pg_schema_dis}.dyn SET {qry_set} WHERE disease_id = %s AND locale_id = %s AND day = %s;'
-        with self.dbi.conn.cursor() as c:
-            psycopg2.extras.execute_batch(c, qry, ((r[28], r[30], r[31], r[11], r[12], r[26], r[14], r[15], r[16], r[18], r[19], r[20], r[24], r[25], r[36], r[37], disease_id, r[0], r[1]) for r in rows))  # index +1 because of 'locale_id' added earlier
+                # Get 'locale_id':
+                locale_id = locales.get(r[4])
+                if locale_id is None:
+                    continue
+                r.insert(0, locale_id)
+
+                n += 1
+                yield (r[28], r[30], r[31], r[11], r[12], r[26], r[14], r[15], r[16], r[18], r[19], r[20], r[24], r[25], r[36], r[37], disease_id, r[0], r[1])  # index +1 because of 'locale_id' added above
+
+        cols = ['case_density', 'r0', 'r0_ci90', 'test_n_pos', 'test_n_neg', 'test_r_pos', 'beds_hosp_cap', 'beds_hosp_usage_tot', 'beds_hosp_usage_covid', 'beds_icu_cap', 'beds_icu_usage_tot', 'beds_icu_usage_covid', 'vax_n_init', 'vax_n_done', 'vax_r_init', 'vax_r_done']
+        qry_set = ', '.join(f'{col} = ${i + 1}' for (i, col) in enumerate(cols))
+        qry_prep = f'PREPARE dyn_upd AS UPDATE {self.dbi.pg_schema_dis}.dyn SET {qry_set} WHERE disease_id = ${len(cols) + 1} AND locale_id = ${len(cols) + 2} AND day = ${len(cols) + 3};'  # parsed and planned once (the parameter types are inferred from the columns)
+        qry = f'EXECUTE dyn_upd ({", ".join(["%s"] * (len(cols) + 3))});'
+        with self.dbi.server_cursor('locale_fips') as c:
+            c.execute(f'SELECT fips, id FROM {self.dbi.pg_schema_main}.locale WHERE fips IS NOT NULL;')
+            locales = {}  # FIPS code to 'locale_id'
+            for (fips, locale_id) in c:
+                locales.setdefault(fips, locale_id)
+
+        with open(fpath, newline='') as f, self.dbi.conn.cursor() as c:
+            reader = csv.reader(f)
+            header = next(reader)
+            c.execute(qry_prep)
+            psycopg2.extras.execute_batch(c, qry, get_rows(reader, locales), page_size=1000)
+            c.execute('DEALLOCATE dyn_upd;')
         self.dbi.conn.commit()
-        print(f' done ({time.perf_counter() - t0:.0f} s; n={len(rows)})', flush=True)
+        print(f' done ({time.perf_counter() - t0:.0f} s; n={n})', flush=True)
 
     def load_covid_19_dyn(self, disease_id):
         print(f'Disease dynamics', flush=True)
 
-        with self.dbi.conn.cursor() as c:
-            c.execute(f'CREATE TEMPORARY TABLE dyn_load (LIKE {self.dbi.pg_schema_dis}.dyn INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING INDEXES);')
+        print(f'    Downloading...', end='', flush=True)
+        t0 = time.perf_counter()
+        urls = [self.URL_DYN_COVID_19_CONF_GLOB, self.URL_DYN_COVID_19_DEAD_GLOB, self.URL_DYN_COVID_19_REC_GLOB, self.URL_DYN_COVID_19_CONF_US, self.URL_DYN_COVID_19_DEAD_US]
+        data = dict(zip(urls, self.download(urls)))
+        print(f' done ({time.perf_counter() - t0:.0f} s)', flush=True)
 
-            self.load_covid_19_dyn_ds(c, disease_id, self.URL_DYN_COVID_19_CONF_GLOB, 'n_conf', 'confirmed', True,  date_col_idx_0=4)
-            self.load_covid_19_dyn_ds(c, disease_id, self.URL_DYN_COVID_19_DEAD_GLOB, 'n_dead', 'deaths',    True,  date_col_idx_0=4)
-            self.load_covid_19_dyn_ds(c, disease_id, self.URL_DYN_COVID_19_REC_GLOB,  'n_rec',  'recovered', True,  date_col_idx_0=4)
+        with self.dbi.conn.cursor() as c:
+            self.dbi.set_bulk_load(c)
+
+            # Get the locale lookups (natural key to 'locale_id'; shared by all datasets of a kind and joined against in bulk):
+            with self.dbi.server_cursor('locale_glob') as cs:
+                cs.execute(f'SELECT admin0, admin1, id FROM {self.dbi.pg_schema_main}.locale WHERE admin2 IS NULL;')
+                locales_glob = {}
+                for (admin0, admin1, locale_id) in cs:
+                    locales_glob.setdefault((admin0, admin1 or ''), locale_id)  # a NULL 'admin1' becomes an empty string
+                locales_glob = pd.Series(locales_glob)
+
+            with self.dbi.server_cursor('locale_us') as cs:
+                cs.execute(f'SELECT id FROM {self.dbi.pg_schema_main}.locale;')
+                locales_us = [locale_id for (locale_id,) in cs]
+                locales_us = pd.Series(locales_us, index=locales_us)
+
+            # Unpivot all datasets into one buffer (one tuple per locale-day and kind of dataset):
+            buf = io.BytesIO()
+            buf.write(self.PG_COPY_BIN_HEADER)
+
+            day_0 = min(  # the first day of the time series
+                self.unpivot_covid_19_dyn_ds(buf, locales_glob, [data[self.URL_DYN_COVID_19_CONF_GLOB], data[self.URL_DYN_COVID_19_DEAD_GLOB], data[self.URL_DYN_COVID_19_REC_GLOB]], True,  date_col_idx_0=4),
+                self.unpivot_covid_19_dyn_ds(buf, locales_us,   [data[self.URL_DYN_COVID_19_CONF_US],   data[self.URL_DYN_COVID_19_DEAD_US],   None],                                   False, date_col_idx_0=12)
+            )
 
-            self.load_covid_19_dyn_ds(c, disease_id, self.URL_DYN_COVID_19_CONF_US,   'n_conf', 'confirmed', False, date_col_idx_0=12)
-            self.load_covid_19_dyn_ds(c, disease_id, self.URL_DYN_COVID_19_DEAD_US,   'n_dead', 'deaths',    False, date_col_idx_0=12)
+            buf.write(self.PG_COPY_BIN_TRAILER)
+            buf.seek(0)
 
+            # Load and pivot (rows of the same locale-day are merged into one):
             print(f'    Consolidating...', end='', flush=True)
             t0 = time.perf_counter()
-            c.execute(f'DELETE FROM {self.dbi.pg_schema_dis}.dyn WHERE disease_id = %s;', [disease_id])
-            c.execute(f'INSERT INTO {self.dbi.pg_schema_dis}.dyn SELECT * FROM dyn_load;')
+            c.execute('CREATE TEMPORARY TABLE dyn_load (locale_id INTEGER NOT NULL, day DATE NOT NULL, n_conf INTEGER, n_dead INTEGER, n_rec INTEGER) ON COMMIT DROP;')  # no indices or keys (rows are merged once below) and no WAL (temporary)
+            c.copy_expert('COPY dyn_load (locale_id, day, n_conf, n_dead, n_rec) FROM stdin WITH (FORMAT binary);', buf)
+            c.execute('ANALYZE dyn_load;')
+            c.execute(f'SELECT EXISTS (SELECT 1 FROM {self.dbi.pg_schema_dis}.dyn WHERE disease_id <> %s);', [disease_id])
+            if c.fetchone()[0]:
+                qry_conflict = (  # merge in place; rows that would not change are left alone
+                    'ON CONFLICT (disease_id, locale_id, day) DO UPDATE SET n_conf = COALESCE(EXCLUDED.n_conf, d.n_conf), n_dead = COALESCE(EXCLUDED.n_dead, d.n_dead), n_rec = COALESCE(EXCLUDED.n_rec, d.n_rec) ' +
+                    'WHERE (d.n_conf, d.n_dead, d.n_rec) IS DISTINCT FROM (COALESCE(EXCLUDED.n_conf, d.n_conf), COALESCE(EXCLUDED.n_dead, d.n_dead), COALESCE(EXCLUDED.n_rec, d.n_rec))'
+                )
+            else:
+                c.execute(f'TRUNCATE {self.dbi.pg_schema_dis}.dyn;')  # no other disease present
+                qry_conflict = ''
+                sql_idx_fk = self.dbi.drop_idx_fk(c, f'{self.dbi.pg_schema_dis}.dyn')  # the table is empty so they are rebuilt from the new rows only
+            c.execute(  # 'day_i' is the 1-based index of the day in the time series (i.e., counted from the first date column of the datasets)
+                f'INSERT INTO {self.dbi.pg_schema_dis}.dyn AS d (disease_id, locale_id, day, day_i, n_conf, n_dead, n_rec) ' +
+                f'SELECT %s, locale_id, day, day - %s + 1, max(n_conf), max(n_dead), max(n_rec) FROM dyn_load GROUP BY locale_id, day {qry_conflict};',
+                [disease_id, day_0.date()]
+            )
+            if len(qry_conflict) == 0 and len(sql_idx_fk) > 0:
+                c.execute(sql_idx_fk)
         self.dbi.conn.commit()
-        self.dbi.vacuum(f'{self.dbi.pg_schema_dis}.dyn')
         print(f' done ({time.perf_counter() - t0:.0f} s)', flush=True)
 
-    def load_covid_19_dyn_ds(self, c, disease_id, url, col, col_human, is_glob, date_col_idx_0, page_size=1024):
-        print(f'    Loading {"global" if is_glob else "US"} {col_human}...', end='', flush=True)
+    def unpivot_covid_19_dyn_ds(self, buf, locales, datas, is_glob, date_col_idx_0):
+        """Unpivots the JHU time series datasets of one kind (the downloaded CSV files' contents for the 'n_conf',
+        'n_dead', and 'n_rec' columns, in that order; None for a missing one) into COPY binary-format tuples for
+        'dyn_load' written to 'buf'.
+
+        Locales are resolved by joining all CSV rows at once against the lookup provided (a Series of 'locale_id's
+        indexed by the natural key) and the wide date matrix is unpivoted into one value per locale-day by NumPy.  The
+        values of all datasets are then aligned on the locale-day so that each tuple carries all three columns instead
+        of the datasets being pivoted back by the caller.  The tuples are encoded as NumPy structured arrays (one
+        big-endian, length-prefixed field after another) so neither the client formats nor the server parses any text;
+        because a NULL field has no value, tuples with the same NULL fields are encoded together.
+
+        Returns the first day of the time series (i.e., the date of the first date column).
+        """
+
+        print(f'    Processing {"global" if is_glob else "US"}...', end='', flush=True)
         t0 = time.perf_counter()
+        cols = ['n_conf', 'n_dead', 'n_rec']
+        vals = {}  # column to the values of its dataset indexed by locale-day
+        day_0 = None
         not_found_cnt = 0
 
-        # (1) Extract:
-        res = urllib.request.urlopen(url)
-        reader = csv.reader([l.decode('utf-8') for l in res.readlines()])
-        header = next(reader)
+        for (col, data) in zip(cols, datas):
+            if data is None:
+                continue
 
-        # (2) Transform:
-        rows = [[None if c == '' else c for c in r] for r in reader]
+            # (1) Extract:
+            header = pd.read_csv(io.BytesIO(data), nrows=0).columns
+            df = pd.read_csv(io.BytesIO(data), dtype={c: str for c in header[:date_col_idx_0]}, keep_default_na=False, na_values=[''])  # only empty strings become missing values; the date columns are parsed as numbers by the parser itself
+            days = pd.to_datetime(header[date_col_idx_0:], format='%m/%d/%y')  # parsed once for all rows
+            df.columns = range(df.shape[1])  # columns are addressed by position below
+            day_0 = days[0] if day_0 is None else min(day_0, days[0])
 
-        # (3) Load:
-        for (i,r) in enumerate(rows):
+            # (2) Transform:
+            # (2.1) Link with the 'main.locale' table (a single hash join of all rows against the lookup):
             if is_glob:
-                c.execute(f'SELECT id FROM {self.dbi.pg_schema_main}.locale WHERE admin0 IS NOT DISTINCT FROM %s AND admin1 IS NOT DISTINCT FROM %s AND admin2 IS NULL;', [r[1], r[0]])
+                keys = pd.MultiIndex.from_arrays([df[1], df[0].fillna('')])
             else:
-                c.execute(f'SELECT id FROM {self.dbi.pg_schema_main}.locale WHERE id = %s;', [r[0]])
-            locale_id = c.fetchone()
-            if locale_id is None:
-                # print(f'Locale not found in the database: {r[:7]}')
-                not_found_cnt += 1
-                continue
-            locale_id = locale_id[0]
-
-            psycopg2.extras.execute_batch(c,
-                f'INSERT INTO dyn_load AS d (disease_id, locale_id, day, day_i, {col}) VALUES (%s,%s,%s,%s,%s) ON CONFLICT ON CONSTRAINT dyn_load_pkey DO ' +
-                f'UPDATE SET {col} = %s WHERE d.disease_id = %s AND d.locale_id = %s AND d.day = %s',
-                ([disease_id, locale_id, header[j], j - date_col_idx_0 + 1, r[j], r[j], disease_id, locale_id, header[j]] for j in range(date_col_idx_0, len(r))),
-                page_size=page_size
-            )
+                keys = pd.Index(pd.to_numeric(df[0]))
+            locale_ids = pd.Series(locales.reindex(keys).values)
+            is_found = locale_ids.notna()
+            not_found_cnt += int((~is_found).sum())
+
+            # (2.2) Unpivot (the row and column indices of the non-empty cells of the date matrix; empty cells would add nothing):
+            m = df.iloc[is_found.values, date_col_idx_0:].to_numpy(dtype=float)
+            (row_idx, day_idx) = np.nonzero(~np.isnan(m))
+            v = pd.Series(m[row_idx, day_idx], index=pd.MultiIndex.from_arrays([locale_ids[is_found].values.astype(int)[row_idx], (days - self.PG_EPOCH).days[day_idx]], names=['locale_id', 'day']))
+            vals[col] = v.groupby(level=[0, 1]).max() if v.index.has_duplicates else v
+
+        # (2.3) Align the datasets on the locale-day (a value missing from a dataset becomes NULL):
+        dyn = pd.concat(list(vals.values()), axis=1, keys=list(vals.keys())).reindex(columns=cols)
+        is_val = dyn.notna().values
+        null_pat = is_val.dot(1 << np.arange(len(cols)))  # bit i set if column i has a value
+
+        # (2.4) Encode (field count followed by every field's length and value; length of -1 and no value for NULL):
+        for p in np.unique(null_pat):
+            sel = null_pat == p
+            dtype = [('n', '>i2'), ('locale_id_len', '>i4'), ('locale_id', '>i4'), ('day_len', '>i4'), ('day', '>i4')]
+            for (i, col) in enumerate(cols):
+                dtype += [(f'{col}_len', '>i4')] + ([(col, '>i4')] if p & (1 << i) else [])
+            rec = np.empty(int(sel.sum()), dtype=dtype)
+            rec['n'] = 2 + len(cols)
+            rec['locale_id_len'], rec['locale_id'] = 4, dyn.index.get_level_values(0).values[sel]
+            rec['day_len'],       rec['day']       = 4, dyn.index.get_level_values(1).values[sel]
+            for (i, col) in enumerate(cols):
+                if p & (1 << i):
+                    rec[f'{col}_len'], rec[col] = 4, dyn[col].values[sel]
+                else:
+                    rec[f'{col}_len'] = -1
+            buf.write(rec.tobytes())
         print(f' done ({time.perf_counter() - t0:.0f} s; {not_found_cnt} not found)', flush=True)
+        return day_0
 
-    def load_covid_19_npi(self, disease_id):
+    def load_covid_19_npi(self, disease_id, data_keystone=None):
         print(f'Non-pharmaceutical interventions', flush=True)
 
-        self.load_covid_19_npi_keystone(disease_id)
+        self.load_covid_19_npi_keystone(disease_id, data_keystone)
+
+    def load_covid_19_npi_keystone(self, disease_id, data=None):
+        """Loads the Keystone dataset; 'data' is its already downloaded content (it is downloaded here if None)."""
 
-    def load_covid_19_npi_keystone(self, disease_id):
         print(f'    Loading Keystone...', end='', flush=True)
         t0 = time.perf_counter()
 
         # (1) Extract:
-        res = urllib.request.urlopen(self.URL_NPI_COVID_19_KEYSTONE)
-        reader = csv.reader([l.decode('utf-8') for l in res.readlines()])
-        header = next(reader)
+        res = io.BytesIO(data if data is not None else self.download_url(self.URL_NPI_COVID_19_KEYSTONE))
+        df = pd.read_csv(res, dtype=str, keep_default_na=False, na_values=[''])  # only empty strings become missing values
+        df.columns = range(df.shape[1])  # columns are addressed by position below
 
         # (2) Transform:
-        rows = [[None if c == '' else c for c in r] for r in reader if r[4] != '']
-            # - convert empty strings to None (the way CSV should function)
-            # - exclude rows with empty start-date
+        df.dropna(subset=[4], inplace=True)  # exclude rows with empty start-date
+
+        # Remove erronous values appearing in columns 6-9:
+        cols = [6,7,8,9]
+        df[cols] = df[cols].mask(df[cols].apply(lambda s: s.str.lower().isin(['t', 'f', 'true', 'false'])))
+
+        # Correct encoding error (https://github.com/Keystone-Strategy/covid19-intervention-data/issues/19):
+        df.loc[df[0] == '35013', 1] = 'Dona Ana'
 
-        types = {}
+        # Make names of intervention types more palletable and persist them (they become primary/foreign keys):
+        df[3], types = pd.factorize(df[3].str.replace('_', ' '))  # ids are assigned in the order of first appearance
+
+        # (2.1) Link with the 'main.locale' table (a single join of all rows against the locales):
         with self.dbi.conn.cursor() as c:
-            for (i,r) in enumerate(rows):
-                # Remove erronous values appearing in columns 6-9:
-                for j in [6,7,8,9]:
-                    if r[j] is not None and r[j].lower() in ['t', 'f', 'true', 'false']:
-                        r[j] = None
-
-                # Correct encoding error (https://github.com/Keystone-Strategy/covid19-intervention-data/issues/19):
-                if r[0] == '35013':
-                    r[1] = 'Dona Ana'
-
-                # Make names of intervention types more palletable and persist them (they become primary/foreign keys):
-                r[3] = r[3].replace('_', ' ')
-                if r[3] not in types.keys():
-                    types[r[3]] = len(types)
-                r[3] = types[r[3]]
-
-                # Link with the 'main.locale' table:
-                c.execute(f"SELECT id FROM {self.dbi.pg_schema_main}.locale WHERE admin0 = 'US' AND admin1 = %s AND admin2 IS NOT DISTINCT FROM %s;", [r[2], r[1]])
-                rr = c.fetchall()
-                if len(rr) != 1:
-                    raise ETLError(f'ETL error: Exactly one locale expected but {len(rr)} found for line {i} that starts with: {r[0], r[2], r[1]}')
-                r.append(rr[0][0])
-        rows = list(dict.fromkeys([tuple(r) for r in rows]))  # remove duplicates (TODO: Doesn't currently work therefore the ON CONFLICT work around below)
+            self.dbi.set_bulk_load(c)
+        with self.dbi.server_cursor('locale_us') as c:
+            c.execute(f"SELECT admin1, COALESCE(admin2, ''), id FROM {self.dbi.pg_schema_main}.locale WHERE admin0 = 'US';")
+            locales = pd.DataFrame(list(c), columns=['admin1', 'admin2', 'locale_id']).groupby(['admin1', 'admin2']).locale_id  # a NULL 'admin2' becomes an empty string
+        keys = pd.MultiIndex.from_arrays([df[2], df[1].fillna('')])
+        locale_cnt = locales.size().reindex(keys, fill_value=0).values
+        if (locale_cnt != 1).any():
+            i = int(np.argmax(locale_cnt != 1))
+            r = df.iloc[i]
+            raise ETLError(f'ETL error: Exactly one locale expected but {locale_cnt[i]} found for line {i} that starts with: {r[0], r[2], r[1]}')
+        df['locale_id'] = locales.first().reindex(keys).values.astype(int)
+
+        # (2.2) Remove duplicate primary keys (the first row with a given key is kept) and write rows ready to COPY:
+        df.drop_duplicates(subset=['locale_id', 3, 4], inplace=True)
+        df.insert(0, 'disease_id', disease_id)
+        buf = io.StringIO()
+        df[['disease_id', 'locale_id', 3, 4, 5, 6, 7, 9, 8]].to_csv(buf, header=False, index=False)  # missing values are written as unquoted empty strings and thus become NULLs
+        buf.seek(0)
 
         # (3) Load:
         with self.dbi.conn.cursor() as c:
-            c.execute(f'DELETE FROM {self.dbi.pg_schema_dis}.npi;')
-            c.execute(f'DELETE FROM {self.dbi.pg_schema_dis}.npi_type;')
+            c.execute(f'TRUNCATE {self.dbi.pg_schema_dis}.npi, {self.dbi.pg_schema_dis}.npi_type;')
+            sql_idx_fk = self.dbi.drop_idx_fk(c, f'{self.dbi.pg_schema_dis}.npi')
 
-            psycopg2.extras.execute_batch(c,
-                f'INSERT INTO {self.dbi.pg_schema_dis}.npi_type (id, name) VALUES (%s,%s);',
-                ((v,k) for (k,v) in types.items())
-            )
-            psycopg2.extras.execute_batch(c,
-                f'INSERT INTO {self.dbi.pg_schema_dis}.npi (disease_id, locale_id, type_id, begin_date, end_date, begin_citation, begin_note, end_citation, end_note) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s) ON CONFLICT DO NOTHING;',
-                ((disease_id, r[10], r[3], r[4], r[5], r[6], r[7], r[9], r[8]) for r in rows)
+            psycopg2.extras.execute_values(c,
+                f'INSERT INTO {self.dbi.pg_schema_dis}.npi_type (id, name) VALUES %s;',
+                enumerate(types),
+                page_size=1000
             )
+            c.copy_expert(f'COPY {self.dbi.pg_schema_dis}.npi (disease_id, locale_id, type_id, begin_date, end_date, begin_citation, begin_note, end_citation, end_note) FROM stdin WITH CSV;', buf)
+            if len(sql_idx_fk) > 0:
+                c.execute(sql_idx_fk)
         self.dbi.conn.commit()
-        self.dbi.vacuum(f'{self.dbi.pg_schema_dis}.npi')
         print(f' done ({time.perf_counter() - t0:.0f} s)', flush=True)
 
     def load_h1n1(self):
@@ -411,28 +678,27 @@ class MainSchema(Schema):
     def load_locales(self):
         self.load_locales_jhu()
         self.load_locales_geonames()
+        self.dbi.vacuum(f'{self.dbi.pg_schema_main}.locale')
 
     def load_locales_geonames(self):
         pass
 
     def load_locales_jhu(self):
         # (1) Extract:
-        res = urllib.request.urlopen(self.URL_LOCALES_JHU)
-        reader = csv.reader([l.decode('utf-8') for l in res.readlines()])
+        res = io.BytesIO(self.download_url(self.URL_LOCALES_JHU))
+        reader = csv.reader(io.TextIOWrapper(res, encoding='utf-8', newline=''))
         header = next(reader)
 
-        # (2) Transform:
-        rows = [[None if c == '' else c for c in r] for r in reader]
+        # (2) Transform (reorder the columns; empty strings are written unquoted and thus become NULLs):
+        buf = io.StringIO()
+        csv.writer(buf).writerows((r[0], r[1], r[2], r[3], r[4], r[7], r[6], r[5], r[8], r[9], r[11]) for r in reader)
+        buf.seek(0)
 
         # (3) Load:
         with self.dbi.conn.cursor() as c:
             c.execute(f'DELETE FROM {self.dbi.pg_schema_main}.locale;')
-            psycopg2.extras.execute_batch(c,
-                f'INSERT INTO {self.dbi.pg_schema_main}.locale (id, iso2, iso3, iso_num, fips, admin0, admin1, admin2, lat, long, pop) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s);',
-                ((r[0], r[1], r[2], r[3], r[4], r[7], r[6], r[5], r[8], r[9], r[11]) for r in rows)
-            )
+            c.copy_expert(f'COPY {self.dbi.pg_schema_main}.locale (id, iso2, iso3, iso_num, fips, admin0, admin1, admin2, lat, long, pop) FROM stdin WITH CSV;', buf)
         self.dbi.conn.commit()
-        self.dbi.vacuum(f'{self.dbi.pg_schema_main}.locale')
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -442,51 +708,140 @@ class PopSchema(Schema):
     Data mirror: https://gitlab.com/momacs/dataset-pop-us-2010-midas
     """
 
-    CountyTxtFile = namedtuple('CountyTxtFile', ('fname', 'tbl', 'ln_re', 'copy_sql', 'upd_coords_col'))
+    CountyTxtFile = namedtuple('CountyTxtFile', ('fname', 'tbl', 'ln_re', 'cols', 'upd_coords_col'))
 
     NA = 'X'  # missing value string
 
-    SQL_CREATE_TEMP_TABLES = '''
-        CREATE TEMP TABLE tmp_school    ON COMMIT DROP AS TABLE {schema}.school    WITH NO DATA;
-        CREATE TEMP TABLE tmp_hospital  ON COMMIT DROP AS TABLE {schema}.hospital  WITH NO DATA;
-        CREATE TEMP TABLE tmp_household ON COMMIT DROP AS TABLE {schema}.household WITH NO DATA;
-        CREATE TEMP TABLE tmp_gq        ON COMMIT DROP AS TABLE {schema}.gq        WITH NO DATA;
-        CREATE TEMP TABLE tmp_workplace ON COMMIT DROP AS TABLE {schema}.workplace WITH NO DATA;
-        CREATE TEMP TABLE tmp_person    ON COMMIT DROP AS TABLE {schema}.person    WITH NO DATA;
-        CREATE TEMP TABLE tmp_gq_person ON COMMIT DROP AS TABLE {schema}.gq_person WITH NO DATA;
-    '''
-
-    COUNTY_TXT_FILES = [
-        CountyTxtFile('schools.txt',    'school',    (False, re.compile(r'^\d+\t\d+\t-?[0-9]+\.[0-9]+\t-?[0-9]+\.[0-9]+$')),           f"COPY tmp_school    (id, stco, lat, long)                                                     FROM stdin WITH CSV DELIMITER AS '\t' NULL AS '{NA}';", True),
-        CountyTxtFile('hospitals.txt',  'hospital',  (True,  re.compile(r'^\d+\t\d+\t\d+\t\d+\t-?[0-9]+\.[0-9]+\t-?[0-9]+\.[0-9]+$')), f"COPY tmp_hospital  (id, worker_cnt, physician_cnt, bed_cnt, lat, long)                       FROM stdin WITH CSV DELIMITER AS '\t' NULL AS '{NA}';", True),
-        CountyTxtFile('households.txt', 'household', (False, re.compile(r'^\d+\t\d+\t\d+\t\d+\t-?[0-9]+\.[0-9]+\t-?[0-9]+\.[0-9]+$')), f"COPY tmp_household (id, stcotrbg, race_id, income, lat, long)                                FROM stdin WITH CSV DELIMITER AS '\t' NULL AS '{NA}';", True),
-        CountyTxtFile('gq.txt',         'gq',        (False, re.compile(r'^\d+\t\w+\t\d+\t\d+\t-?[0-9]+\.[0-9]+\t-?[0-9]+\.[0-9]+$')), f"COPY tmp_gq        (id, type, stcotrbg, person_cnt, lat, long)                               FROM stdin WITH CSV DELIMITER AS '\t' NULL AS '{NA}';", True),
-        CountyTxtFile('workplaces.txt', 'workplace', (False, re.compile(r'^\d+\t-?[0-9]+\.[0-9]+\t-?[0-9]+\.[0-9]+$')),                f"COPY tmp_workplace (id, lat, long)                                                           FROM stdin WITH CSV DELIMITER AS '\t' NULL AS '{NA}';", True),
-        CountyTxtFile('people.txt',     'person',    (False, re.compile(r'^\d+\t\d+\t\d+\t[FM]\t\d+\t\d+\t(?:\d+|X)\t(?:\d+|X)$')),    f"COPY tmp_person    (id, household_id, age, sex, race_id, relate_id, school_id, workplace_id) FROM stdin WITH CSV DELIMITER AS '\t' NULL AS '{NA}';", False),
-        CountyTxtFile('gq_people.txt',  'gq_person', (False, re.compile(r'^\d+\t\d+\t\d+\t[FM]$')),                                    f"COPY tmp_gq_person (id, gq_id, age, sex)                                                     FROM stdin WITH CSV DELIMITER AS '\t' NULL AS '{NA}';", False)
+    COPY_READ_SIZE = 1 << 20  # bytes the COPY streams read at a time (psycopg2 reads 8 KiB by default)
+
+    SQL_CREATE_STAGE_TABLE = 'CREATE UNLOGGED TABLE {stage} AS TABLE {schema}.{tbl} WITH NO DATA;'
+
+    SQL_CREATE_STAGE_LN_TABLE = 'CREATE UNLOGGED TABLE {stage} (file_i INT, ln TEXT);'  # whole lines of the files that are filtered (and the index of their file)
+
+    COUNTY_TXT_FILES = [  # the line regular expressions are matched by the database (and thus use its regex flavor)
+        CountyTxtFile('schools.txt',    'school',    (False, r'\d+\t\d+\t-?[0-9]+\.[0-9]+\t-?[0-9]+\.[0-9]+'),           ('id', 'stco', 'lat', 'long'),                                                             True),
+        CountyTxtFile('hospitals.txt',  'hospital',  (True,  r'\d+\t\d+\t\d+\t\d+\t-?[0-9]+\.[0-9]+\t-?[0-9]+\.[0-9]+'), ('id', 'worker_cnt', 'physician_cnt', 'bed_cnt', 'lat', 'long'),                           True),
+        CountyTxtFile('households.txt', 'household', (False, r'\d+\t\d+\t\d+\t\d+\t-?[0-9]+\.[0-9]+\t-?[0-9]+\.[0-9]+'), ('id', 'stcotrbg', 'race_id', 'income', 'lat', 'long'),                                    True),
+        CountyTxtFile('gq.txt',         'gq',        (False, r'\d+\t\w+\t\d+\t\d+\t-?[0-9]+\.[0-9]+\t-?[0-9]+\.[0-9]+'), ('id', 'type', 'stcotrbg', 'person_cnt', 'lat', 'long'),                                   True),
+        CountyTxtFile('workplaces.txt', 'workplace', (False, r'\d+\t-?[0-9]+\.[0-9]+\t-?[0-9]+\.[0-9]+'),                ('id', 'lat', 'long'),                                                                     True),
+        CountyTxtFile('people.txt',     'person',    (False, r'\d+\t\d+\t\d+\t[FM]\t\d+\t\d+\t(?:\d+|X)\t(?:\d+|X)'),    ('id', 'household_id', 'age', 'sex', 'race_id', 'relate_id', 'school_id', 'workplace_id'), False),
+        CountyTxtFile('gq_people.txt',  'gq_person', (False, r'\d+\t\d+\t\d+\t[FM]'),                                    ('id', 'gq_id', 'age', 'sex'),                                                             False)
     ]
 
-    def load_state(self, st_fips):
+    def load_state(self, st_fips, n_conn=8, work_mem='256MB', maintenance_work_mem='1GB'):
         """Loads a state to the database.
 
         The state ZIP file is expected to have been uncompressed to the self.fsi.dpath_rt directory.
+
+        The county files of each type are split into up to 'n_conn' parts, each copied on its own connection into its
+        own unlogged staging table so that the COPY streams run concurrently (at most 'n_conn' at a time).  The parts
+        are then merged into the destination tables on the main connection with one INSERT per table.  The merges are
+        done in a single transaction so that a failure leaves the population tables and their indices as they were.
+
+        The geometry index of a destination table is dropped and rebuilt in bulk after the merge only if the table is
+        empty (i.e., this is the first state loaded).  Otherwise, the index is kept and maintained by the INSERT;
+        rebuilding it would re-index every state loaded before.
+
+        Only the main connection raises 'work_mem' and 'maintenance_work_mem' (to the values specified) because the
+        others merely COPY into unindexed tables; the memory used is therefore independent of 'n_conn'.
         """
 
         log = self.fsi.get_log()
+
+        # Get the columns (and their types) of all destination tables at once:
+        with self.dbi.conn.cursor() as c:
+            c.execute('SELECT table_name, column_name, data_type FROM information_schema.columns WHERE table_schema = %s;', [self.dbi.pg_schema_pop])
+            tbl_cols = {}
+            for (tbl, col, col_type) in c.fetchall():
+                tbl_cols.setdefault(tbl, {})[col] = col_type
+
+        # Split the county files of each type into parts and create a staging table for each part (the names carry the
+        # main connection's backend PID so that concurrent loads into the same database don't share staging tables):
+        pid = self.dbi.conn.get_backend_pid()
+        parts = {}  # table name to the list of (staging table, files) pairs; a file is an (index, path) pair
         with self.dbi.conn.cursor() as c:
-            c.execute(self.__class__.SQL_CREATE_TEMP_TABLES.format(schema=self.dbi.pg_schema_pop))
-            c.execute('SET CONSTRAINTS ALL DEFERRED;')
             for ctf in self.__class__.COUNTY_TXT_FILES:
-                self.load_county_txt_files(c, ctf, st_fips, log)
+                files = list(enumerate(p for p in sorted(self.fsi.dpath_rt.rglob(ctf.fname)) if os.path.getsize(p) > 0))
+                parts[ctf.tbl] = [(f'{self.dbi.pg_schema_pop}.stage_{ctf.tbl}_{pid}_{i}', files[i::n_conn]) for i in range(min(n_conn, len(files)))]
+                for (stage, _) in parts[ctf.tbl]:
+                    c.execute(f'DROP TABLE IF EXISTS {stage};')  # left behind by an interrupted load of an earlier backend with the same PID
+                    c.execute((self.__class__.SQL_CREATE_STAGE_LN_TABLE if ctf.ln_re[0] else self.__class__.SQL_CREATE_STAGE_TABLE).format(stage=stage, schema=self.dbi.pg_schema_pop, tbl=ctf.tbl))
         self.dbi.conn.commit()
 
-    def load_county_txt_files(self, c, county_txt_file, st_fips, log):
-        """Process data from the specified county-level file; file of this types for all counties are processed at the
-        same time.
+        def copy(ctf, stage, files):  # copies one part on a new connection
+            conn = self.dbi.connect()
+            try:
+                with conn.cursor() as c:
+                    self.dbi.set_bulk_load(c, work_mem=None, maintenance_work_mem=None)
+                    self.copy_county_txt_files(c, ctf, stage, files)
+                conn.commit()
+            finally:
+                conn.close()
+
+        try:
+            with futures.ThreadPoolExecutor(max_workers=n_conn) as ex:
+                fs = [ex.submit(copy, ctf, stage, files) for ctf in self.__class__.COUNTY_TXT_FILES for (stage, files) in parts[ctf.tbl]]
+                for f in fs:
+                    f.result()
+
+            with self.dbi.conn.cursor() as c:
+                self.dbi.set_bulk_load(c, work_mem, maintenance_work_mem)
+                c.execute('SET CONSTRAINTS ALL DEFERRED;')
+
+                # Drop the geometry indices of the empty tables (they are rebuilt in bulk once all county files have been merged):
+                idx_tbls = []
+                for ctf in self.__class__.COUNTY_TXT_FILES:
+                    if ctf.upd_coords_col:
+                        c.execute(f'SELECT NOT EXISTS (SELECT 1 FROM {self.dbi.pg_schema_pop}.{ctf.tbl});')
+                        if c.fetchone()[0]:
+                            c.execute(f'DROP INDEX IF EXISTS {self.dbi.pg_schema_pop}.{ctf.tbl}__geom_idx;')
+                            idx_tbls.append(ctf.tbl)
+
+                for ctf in self.__class__.COUNTY_TXT_FILES:  # referenced tables come first
+                    if len(parts[ctf.tbl]) > 0:
+                        self.load_county_txt_files(c, ctf, parts[ctf.tbl], log, tbl_cols.get(ctf.tbl, {}))
+
+                for tbl in idx_tbls:
+                    c.execute(f'CREATE INDEX {tbl}__geom_idx ON {self.dbi.pg_schema_pop}.{tbl} USING GIST(coords);')
+            self.dbi.conn.commit()
+        finally:
+            self.dbi.conn.rollback()  # no-op after a successful commit
+            with self.dbi.conn.cursor() as c:
+                for (stage, _) in itertools.chain.from_iterable(parts.values()):
+                    c.execute(f'DROP TABLE IF EXISTS {stage};')
+            self.dbi.conn.commit()
+
+    def copy_county_txt_files(self, c, county_txt_file, stage, files):
+        """Copies the data lines of the county-level files specified (i.e., a list of (index, path) pairs) into the
+        staging table specified.
+
+        The files are read as they are consumed and their content is chained in order into a single ChunkFile object so
+        that each part is copied with one COPY.  If no content filtering is to be done, the lines are copied as rows of
+        the destination table.  Otherwise, they are copied whole, each along with the index of its file, and filtered on
+        merging.
+        """
 
-        This method uses one or two file objects.  If no content filtering is to be done, the data file is opened and
-        used directly without censoring.  Otherwise, a StringIO object is used to store those data file lines that
-        pass the filtering.  Hence, in the second case, two file objects are used.
+        def chunks():
+            for (file_i, path) in files:
+                txt = read_county_txt_file(path)
+                if county_txt_file.ln_re[0] and txt != b'':
+                    prefix = b'%d\x1f' % file_i
+                    txt = prefix + txt[:-1].replace(b'\n', b'\n' + prefix) + b'\n'
+                yield txt
+
+        if not county_txt_file.ln_re[0]:
+            c.copy_expert(f"COPY {stage} ({', '.join(county_txt_file.cols)}) FROM stdin WITH (FORMAT text, NULL '{self.NA}');", ChunkFile(chunks()), self.COPY_READ_SIZE)
+        else:
+            c.copy_expert(f"COPY {stage} (file_i, ln) FROM stdin WITH (FORMAT text, DELIMITER E'\\x1f');", ChunkFile(chunks()), self.COPY_READ_SIZE)  # whole lines (the delimiter doesn't occur in the data)
+
+    def load_county_txt_files(self, c, county_txt_file, parts, log, cols):
+        """Process data from the specified county-level file; the files of this type staged in the 'parts' specified
+        (i.e., a list of (staging table, files) pairs) are merged into the destination table at the same time.  The
+        destination table's column names mapped to their types are expected in the 'cols' dict.
+
+        If content filtering is to be done, only the lines that match the line regular expression are split, cast, and
+        inserted into the destination table (i.e., the validation is set-based and done by the database); the others
+        are logged, each after the path of its file.
 
         All this complexity is necessary to clean up the data because as it turns out the synthetic population data is
         plagued with significant problems (e.g., negative household income, non-number geo-coordinates, and shifted
@@ -494,65 +849,50 @@ class PopSchema(Schema):
 
         The synthetic population uses the WGS 84 standard (i.e., srid = 4326) while the US Census Bureau uses srid of
         4269 for the geographic and cartographic data.  This method applies the transform from population to geographic
-        data.  Additionally, a geometry index is created.
+        data (in the same single pass).  The geometry indices are rebuilt by the caller.
         """
 
-        for path_file in self.fsi.dpath_rt.rglob(county_txt_file.fname):
-            if os.path.getsize(path_file) == 0:
-                continue
+        tbl = county_txt_file.tbl
 
-            with open(path_file, 'r') as f01, io.StringIO() as f02:
-                next(f01)
-
-                log.write(f'{str(path_file)}\n')
-                if county_txt_file.ln_re[0]:
-                    for ln in f01:
-                        if county_txt_file.ln_re[1].match(ln):
-                            f02.write(ln)
-                        else:
-                            log.write(ln)
-                    f02.seek(0)
-                else:
-                    f02 = f01
-
-                c.copy_expert(county_txt_file.copy_sql.format(schema=self.dbi.pg_schema_pop), f02)
-                tbl = county_txt_file.tbl
-
-                # Store the state FIPS code:
-                # c.execute(f"SELECT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'tmp_{tbl}' AND column_name = 'st_fips');")
-                # if bool(c.fetchone()[0]):
-                #     c.execute(f"UPDATE tmp_{tbl} SET st_fips = '{st_fips}';")
-
-                # Link with the 'main.locale' table:
-                # c.execute(f"SELECT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'tmp_{tbl}' AND column_name = 'st_id');")
-                # if bool(c.fetchone()[0]):
-                if self.dbi.is_col('st_id', f'{tbl}', self.dbi.pg_schema_pop):
-                    # c.execute(f"SELECT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'tmp_{tbl}' AND column_name = 'stco');")
-                    # if bool(c.fetchone()[0]):
-                    if self.dbi.is_col('stco', f'{tbl}', self.dbi.pg_schema_pop):
-                        # c.execute(f'UPDATE tmp_{tbl} SET st_id = (SELECT l.id FROM main.locale l LEFT JOIN pop.household h ON l.fips = substring(h.stcotrbg from 1 for 2));')
-                        # c.execute(f'UPDATE tmp_{tbl} SET co_id = (SELECT l.id FROM main.locale l LEFT JOIN pop.household h ON l.fips = substring(h.stcotrbg from 3 for 3));')
-                        c.execute(f'UPDATE tmp_{tbl} x SET st_id = l.id FROM main.locale l WHERE l.fips = substring(x.stco from 1 for 2);')
-                        c.execute(f'UPDATE tmp_{tbl} x SET co_id = l.id FROM main.locale l WHERE l.fips = substring(x.stco from 1 for 5);')
-                    # c.execute(f"SELECT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'tmp_{tbl}' AND column_name = 'stcotrbg');")
-                    # if bool(c.fetchone()[0]):
-                    if self.dbi.is_col('stcotrbg', f'{tbl}', self.dbi.pg_schema_pop):
-                        # c.execute(f'UPDATE tmp_{tbl} SET st_id = (SELECT l.id FROM main.locale l LEFT JOIN pop.household h ON l.fips = substring(h.stcotrbg from 1 for 2));')
-                        # c.execute(f'UPDATE tmp_{tbl} SET co_id = (SELECT l.id FROM main.locale l LEFT JOIN pop.household h ON l.fips = substring(h.stcotrbg from 3 for 3));')
-                        c.execute(f'UPDATE tmp_{tbl} x SET st_id = l.id FROM main.locale l WHERE l.fips = substring(x.stcotrbg from 1 for 2);')
-                        c.execute(f'UPDATE tmp_{tbl} x SET co_id = l.id FROM main.locale l WHERE l.fips = substring(x.stcotrbg from 1 for 5);')
-
-                # Update the GEOM column and transform to the target srid:
-                if county_txt_file.upd_coords_col:
-                    c.execute(f"UPDATE tmp_{tbl} SET coords = ST_GeomFromText('POINT(' || long || ' ' || lat || ')', 4326) WHERE lat != 0 AND long != 0;")
-                    c.execute(f'UPDATE tmp_{tbl} SET coords = ST_Transform(coords, 4269) WHERE lat != 0 AND long != 0;')
-
-                # Populate the destination table:
-                c.execute(f'INSERT INTO {self.dbi.pg_schema_pop}.{tbl} SELECT * FROM tmp_{tbl} ON CONFLICT DO NOTHING;')
-                c.execute(f'TRUNCATE tmp_{tbl};')
+        stages = ' UNION ALL '.join(f'TABLE {stage}' for (stage, _) in parts)
+        lns_rej = {}  # file index to the lines rejected
+        if not county_txt_file.ln_re[0]:
+            src = f'({stages})'
+        else:
+            ln_re = f'^(?:{county_txt_file.ln_re[1]})$'
+            for (stage, _) in parts:
+                c.execute(f'DELETE FROM {stage} WHERE ln !~ %s RETURNING file_i, ln;', [ln_re])  # the regex is evaluated once per line
+                for (file_i, ln) in c:
+                    lns_rej.setdefault(file_i, []).append(ln)
+            src = ', '.join(f"NULLIF(f[{i}], '{self.NA}')::{cols[col]} AS {col}" for (i, col) in enumerate(county_txt_file.cols, start=1))
+            src = f"(SELECT {src} FROM (SELECT string_to_array(ln, E'\\t') AS f FROM ({stages}) z) y)"  # the lines are split and cast as they are read
+
+        for (file_i, path) in sorted(itertools.chain.from_iterable(files for (_, files) in parts)):
+            log.write(f'{str(path)}\n')
+            log.writelines(f'{ln}\n' for ln in lns_rej.get(file_i, []))
+
+        # Populate the destination table; the locale links and the coordinates are computed on the way in:
+        vals = {col: f'x.{col}' for col in county_txt_file.cols}
+        joins = ''
+
+        # Link with the 'main.locale' table:
+        fips_col = next((col for col in ('stco', 'stcotrbg') if col in cols), None)  # the FIPS code prefixes the value
+        if 'st_id' in cols and fips_col is not None:
+            vals['st_id'] = 'ls.id'
+            vals['co_id'] = 'lc.id'
+            joins = (
+                f'LEFT JOIN {self.dbi.pg_schema_main}.locale ls ON ls.fips = substring(x.{fips_col} from 1 for 2) ' +
+                f'LEFT JOIN {self.dbi.pg_schema_main}.locale lc ON lc.fips = substring(x.{fips_col} from 1 for 5)'
+            )
+
+        # Set the GEOM column and transform to the target srid:
+        if county_txt_file.upd_coords_col:
+            vals['coords'] = 'CASE WHEN x.lat != 0 AND x.long != 0 THEN ST_Transform(ST_SetSRID(ST_MakePoint(x.long, x.lat), 4326), 4269) END'
+
+        c.execute(f"INSERT INTO {self.dbi.pg_schema_pop}.{tbl} ({', '.join(vals.keys())}) SELECT {', '.join(vals.values())} FROM {src} x {joins} ON CONFLICT DO NOTHING;")
 
     def test(self):
-        with self.conn.dbi.cursor() as c:
+        with self.dbi.conn.cursor(cursor_factory=psycopg2.extras.NamedTupleCursor) as c:
             c.execute(f'SELECT COUNT(*) AS n FROM {self.dbi.pg_schema_pop}.school;')
             print(c.fetchone().n)
 
@@ -565,54 +905,38 @@ class VaxSchema(Schema):
     Data mirror: https://world-modelers.s3.amazonaws.com/data/fluvax/CDC_Fluvax.xlsx
     """
 
+    AGE_LOOKUP = {  # age group name to its quantitative description
+        '13-17 years'                  : {'age_0': 13,  'age_1': 17,     'is_high_risk': False},
+        '18-49 years'                  : {'age_0': 18,  'age_1': 49,     'is_high_risk': False},
+        '18-49 years at high risk'     : {'age_0': 18,  'age_1': 49,     'is_high_risk': True},
+        '18-49 years not at high risk' : {'age_0': 18,  'age_1': 49,     'is_high_risk': False},
+        '18-64 years'                  : {'age_0': 18,  'age_1': 64,     'is_high_risk': False},
+        '18-64 years at high risk'     : {'age_0': 18,  'age_1': 64,     'is_high_risk': True},
+        '18-64 years not at high risk' : {'age_0': 18,  'age_1': 64,     'is_high_risk': False},
+        '5-12 years'                   : {'age_0': 5,   'age_1': 12,     'is_high_risk': False},
+        '50-64 years'                  : {'age_0': 50,  'age_1': 64,     'is_high_risk': False},
+        '6 months - 17 years'          : {'age_0': 0.5, 'age_1': 17,     'is_high_risk': False},
+        '6 months - 4 years'           : {'age_0': 0.5, 'age_1': 4,      'is_high_risk': False},
+        '≥18 years'                    : {'age_0': 18,  'age_1': np.nan, 'is_high_risk': False},
+        '≥6 months'                    : {'age_0': 0.5, 'age_1': np.nan, 'is_high_risk': False},
+        '≥65 years'                    : {'age_0': 65,  'age_1': np.nan, 'is_high_risk': False}
+    }
+
     def process_df_(self, inner_df, df, age=None, race=None):
         """
         Processes intermediate vaccination dataframe
         """
-        proc_dfs = pd.DataFrame()
+        # Reshape the (row, date, metric) block of values into one row per date and row in a single pass:
+        n = inner_df.shape[0]
         iters = int(inner_df.shape[1]/6)
-        for i in range(iters):
-            df_ = inner_df.iloc[:,i*6:(i+1)*6]
-            date = df_.columns[0].split('.')[0]
-            df_.columns = ['COVERAGE','LL','UL','CI','SAMPLE','TARGET']
-            df_['DATE'] = date
-            df_ = pd.concat([df.iloc[:,0:1],df_], axis=1)
-            df_['AGE'] = age
-            df_['RACE'] = race
-            proc_dfs = proc_dfs.append(df_)
+        vals = inner_df.iloc[:, :iters*6].to_numpy().reshape(n, iters, 6).transpose(1, 0, 2).reshape(iters*n, 6)
+        proc_dfs = pd.DataFrame(vals, columns=['COVERAGE','LL','UL','CI','SAMPLE','TARGET']).infer_objects()
+        proc_dfs.insert(0, df.columns[0], np.tile(df.iloc[:,0].values, iters))
+        proc_dfs['DATE'] = np.repeat([c.split('.')[0] for c in inner_df.columns[:iters*6:6]], n)
+        proc_dfs['AGE'] = age
+        proc_dfs['RACE'] = race
         return proc_dfs
 
-    def parse_CI(self, CI):
-        """
-        Parses confidence interval into a float
-        """
-        if not pd.isna(CI):
-            return float(CI.split('±')[1].split(')')[0])
-        else:
-            return CI
-
-    def age_parser(self, row):
-        age_lookup = {'13-17 years': {'age_0': 13, 'age_1': 17, 'is_high_risk': False},
-                     '18-49 years': {'age_0': 18, 'age_1': 49, 'is_high_risk': False},
-                     '18-49 years at high risk': {'age_0': 18, 'age_1': 49, 'is_high_risk': True},
-                     '18-49 years not at high risk': {'age_0': 18, 'age_1': 49, 'is_high_risk': False},
-                     '18-64 years': {'age_0': 18, 'age_1': 64, 'is_high_risk': False},
-                     '18-64 years at high risk': {'age_0': 18, 'age_1': 64, 'is_high_risk': True},
-                     '18-64 years not at high risk': {'age_0': 18, 'age_1': 64, 'is_high_risk': False},
-                     '5-12 years': {'age_0': 5, 'age_1': 12, 'is_high_risk': False},
-                     '50-64 years': {'age_0': 50, 'age_1': 64, 'is_high_risk': False},
-                     '6 months - 17 years': {'age_0': 0.5, 'age_1': 17, 'is_high_risk': False},
-                     '6 months - 4 years': {'age_0': 0.5, 'age_1': 4, 'is_high_risk': False},
-                     '≥18 years': {'age_0': 18, 'age_1': np.nan, 'is_high_risk': False},
-                     '≥6 months': {'age_0': 0.5, 'age_1': np.nan, 'is_high_risk': False},
-                     '≥65 years': {'age_0': 65, 'age_1': np.nan, 'is_high_risk': False}
-                     }
-        match = age_lookup[row['name']]
-        row['age_0'] = match['age_0']
-        row['age_1'] = match['age_1']
-        row['is_high_risk'] = match['is_high_risk']
-        return row
-
     def get_locales(self, df):
         locale_df = pd.read_sql("SELECT id, admin1 FROM main.locale WHERE admin0='US' AND admin2 IS NULL;", self.engine)
         df = df.join(locale_df.set_index('admin1'), how='inner', on='locale')
@@ -626,37 +950,17 @@ class VaxSchema(Schema):
         This function performs a major pivot on the CDC data to convert it from a human-readable
         spreadsheet into a nicely formatted Pandas dataframe.
         """
-        df = pd.read_excel('CDC_Fluvax.xlsx', skiprows=2)
-        df_headers = pd.read_excel('CDC_Fluvax.xlsx')[:1]
-        cols_1 = list(df_headers.columns)[1:]
-        cols_2 = list(df_headers.iloc[0])[1:]
-
-        cols_1_ = []
-        cols_1_inds = {}
-        count = 0
-        for i in cols_1:
-            if 'Unnamed' in i:
-                cols_1_.append(None)
-            else:
-                cols_1_.append(i)
-                cols_1_inds[count] = i
-            count += 1
-
-        cols_2_ = []
-        cols_2_inds = {}
-        count = 0
-        for i in cols_2:
-            if pd.isna(i):
-                cols_2_.append(None)
-            else:
-                cols_2_.append(i)
-                cols_2_inds[count] = i
-            count += 1
+        # Parse the spreadsheet once; the first two rows are the age and race group headers and the third one is the header of the data:
+        raw = pd.read_excel('CDC_Fluvax.xlsx', header=None)
+        df = raw.iloc[3:].reset_index(drop=True).infer_objects()
+        df.columns = list(raw.iloc[2])
+        cols_2 = raw.iloc[1, 1:].reset_index(drop=True)
+        cols_2_inds = list(zip(np.flatnonzero(cols_2.notna()), cols_2.dropna()))  # (position, name) of every group header
 
         df_age = df.iloc[:,:721]
         df_race = pd.concat([df.iloc[:,0:1],df.iloc[:,721:]], axis=1)
-        ages_l = list(cols_2_inds.items())[:15]
-        race_l = list(cols_2_inds.items())[14:]
+        ages_l = cols_2_inds[:15]
+        race_l = cols_2_inds[14:]
         race_l.append((df.shape[1], None))
 
         age_frames = {}
@@ -675,41 +979,28 @@ class VaxSchema(Schema):
             df_ = df_race.iloc[:, start:end]
             race_frames[race] = df_
 
-        out_df = pd.DataFrame()
-        for kk, vv in age_frames.items():
-            interim_df = self.process_df_(vv, df, age=kk)
-            out_df = out_df.append(interim_df)
-
-        for kk, vv in race_frames.items():
-            interim_df = self.process_df_(vv, df, race=kk)
-            out_df = out_df.append(interim_df)
+        out_df = pd.concat(
+            [self.process_df_(vv, df, age=kk)  for kk, vv in age_frames.items()] +
+            [self.process_df_(vv, df, race=kk) for kk, vv in race_frames.items()],
+            ignore_index=True
+        )
 
         out_df = out_df.rename(columns={'Names':'LOCALE'})
-        out_df['START_YEAR'] = out_df['DATE'].apply(lambda x: int(x.split('-')[0]))
-        out_df['END_YEAR'] = out_df['DATE'].apply(lambda x: int('20'+ x.split('-')[1]))
+        yrs = out_df['DATE'].str.split('-', n=1, expand=True)  # e.g., '2010-11'
+        out_df['START_YEAR'] = yrs[0].astype(np.int16)
+        out_df['END_YEAR'] = ('20' + yrs[1]).astype(np.int16)
         del(out_df['DATE'])
 
-        # Convert AGE and RACE to categorical variables
-        out_df['AGE'] = pd.Categorical(out_df.AGE)
-        out_df['AGE_ID'] = out_df.AGE.cat.codes
+        # Convert AGE and RACE to ids (assigned in name order; missing values get a nullable integer NA)
+        age_codes, age_names = pd.factorize(out_df.AGE, sort=True)
+        out_df['AGE_ID'] = pd.arrays.IntegerArray(age_codes.astype(np.int32), mask=(age_codes == -1))
 
-        out_df['RACE'] = pd.Categorical(out_df.RACE)
-        out_df['RACE_ID'] = out_df.RACE.cat.codes
-
-        out_df['RACE_ID'] = out_df.RACE_ID.replace(-1, np.nan)
-        out_df['AGE_ID'] = out_df.AGE_ID.replace(-1, np.nan)
+        race_codes, race_names = pd.factorize(out_df.RACE, sort=True)
+        out_df['RACE_ID'] = pd.arrays.IntegerArray(race_codes.astype(np.int32), mask=(race_codes == -1))
 
         # Generate lookup tables
-        age_cats = []
-        for kk, vv in dict( enumerate(out_df.AGE.cat.categories )).items():
-            age_cats.append({'id': kk, 'name': vv})
-
-        race_cats = []
-        for kk, vv in dict( enumerate(out_df.RACE.cat.categories )).items():
-            race_cats.append({'id': kk, 'name': vv})
-
-        age_cats_df = pd.DataFrame(age_cats)
-        race_cats_df = pd.DataFrame(race_cats)
+        age_cats_df = pd.DataFrame({'id': range(len(age_names)), 'name': age_names})
+        race_cats_df = pd.DataFrame({'id': range(len(race_names)), 'name': race_names})
 
         del(out_df['AGE'])
         del(out_df['RACE'])
@@ -721,11 +1012,11 @@ class VaxSchema(Schema):
         # replace NR values with null
         out_df = out_df.replace(to_replace='.*NR.*', value=np.nan, regex=True)
 
-        # parse CI field
-        out_df['ci'] = out_df.ci.apply(lambda x: self.parse_CI(x))
+        # parse CI field (the number following '±')
+        out_df['ci'] = pd.to_numeric(out_df.ci.astype(str).str.extract(r'±\s*([\d.]+)', expand=False))
 
         # update age table with quantitative lookups
-        age_cats_df = age_cats_df.apply(lambda x: self.age_parser(x), axis=1)
+        age_cats_df = age_cats_df.join(pd.DataFrame.from_dict(self.AGE_LOOKUP, orient='index'), on='name')
 
         # map locales to main schema
         out_df = self.get_locales(out_df)
@@ -735,20 +1026,22 @@ class VaxSchema(Schema):
     def load_vax(self):
         """
         Loads Flu vaccine data to database.
-        Uses Pandas and SQLAlchemy. If the data is already in the database, it alerts the user.
+        Uses Pandas and COPY (all three tables in one transaction). If the data is already in the database, it alerts the user.
         """
-        urllib.request.urlretrieve('https://world-modelers.s3.amazonaws.com/data/fluvax/CDC_Fluvax.xlsx', 'CDC_Fluvax.xlsx')
+        self.download_url('https://world-modelers.s3.amazonaws.com/data/fluvax/CDC_Fluvax.xlsx', 'CDC_Fluvax.xlsx')
         data, age, race = self.process_vax_file()
         try:
-            age.to_sql('age', con=self.engine, schema=self.dbi.pg_schema_vax, index=False, if_exists='append')
-            race.to_sql('race', con=self.engine, schema=self.dbi.pg_schema_vax, index=False, if_exists='append')
-            data.to_sql('vax', con=self.engine, schema=self.dbi.pg_schema_vax, index=False, if_exists='append')
-        except IntegrityError as e:
-            assert isinstance(e.orig, UniqueViolation)
+            with self.dbi.conn.cursor() as c:
+                self.dbi.copy_df(c, age,  f'{self.dbi.pg_schema_vax}.age')
+                self.dbi.copy_df(c, race, f'{self.dbi.pg_schema_vax}.race')
+                self.dbi.copy_df(c, data, f'{self.dbi.pg_schema_vax}.vax')
+            self.dbi.conn.commit()
+        except UniqueViolation:
+            self.dbi.conn.rollback()
             print("Vaccination data is already loaded in LocaleDB.")
 
     def test(self):
-        with self.conn.dbi.cursor() as c:
+        with self.dbi.conn.cursor(cursor_factory=psycopg2.extras.NamedTupleCursor) as c:
             c.execute(f'SELECT COUNT(*) AS n FROM {self.dbi.pg_schema_vax}.vax;')
             print(c.fetchone().n)
 
@@ -761,37 +1054,6 @@ class HealthSchema(Schema):
     Data mirror: https://world-modelers.s3.amazonaws.com/data/CHR/CHR_trends_csv_2020.csv
     """
 
-    def format_row(self, row):
-        """
-        Fixes start_year and end_year
-        also formats FIPS column
-        """
-        if len(row.yearspan)>4:
-            row['start_year'] = int(row.yearspan.split('-')[0])
-            row['end_year'] = int(row.yearspan.split('-')[1])
-        else:
-            row['start_year'] = int(row.yearspan)
-            row['end_year'] = int(row.yearspan)
-
-        st = str(row.statecode)
-        ct = str(row.countycode)
-        if len(st) == 1:
-            st = '0'+ st
-        if len(ct) == 1:
-            ct = '00' + ct
-        elif len(ct) == 2:
-            ct = '0' + ct
-
-
-        if st == '00': # for all of US
-            row['fips'] = '840'
-
-        elif ct == '000': # for a state
-            row['fips'] = '000' + st
-        else: # for a county
-            row['fips'] = st + ct
-        return row
-
     def get_locales(self, df):
         locale_df = pd.read_sql("SELECT id, fips FROM main.locale where admin0='US'", self.engine)
         df = df.join(locale_df.set_index('fips'), how='inner', on='fips')
@@ -805,13 +1067,22 @@ class HealthSchema(Schema):
         This function performs a major pivot on the CDC data to convert it from a human-readable
         spreadsheet into a nicely formatted Pandas dataframe.
         """
-        df = pd.read_csv("CHR_trends_csv_2020.csv", encoding = "ISO-8859-1", thousands=",", low_memory=False)
+        cols = ['state', 'statecode', 'countycode', 'yearspan', 'measureid', 'numerator', 'denominator', 'rawvalue', 'cilow', 'cihigh', 'chrreleaseyear', 'differflag', 'trendbreak']  # the only columns used (the rest are skipped by the parser)
+        df = pd.read_csv("CHR_trends_csv_2020.csv", encoding = "ISO-8859-1", thousands=",", usecols=cols, low_memory=False)
         if st_fips != '-':
             df = df[df['state']==st_fips]
-        df['yearspan'] = df['yearspan'].apply(lambda x: str(x))
         df['differflag'] = df.differflag.replace(1, True).fillna(False)
         df['trendbreak'] = df.trendbreak.replace(1, True).fillna(False)
-        df = df.apply(lambda row: self.format_row(row), axis=1)
+
+        # Fix start_year and end_year (a year span is either a single year or two years separated by a dash):
+        yrs = df['yearspan'].astype(str).str.split('-', n=1, expand=True).reindex(columns=[0, 1])
+        df['start_year'] = yrs[0].astype(int)
+        df['end_year'] = yrs[1].fillna(yrs[0]).astype(int)
+
+        # Format the FIPS column (the whole US, a state, or a county):
+        st = df['statecode'].astype(str).str.zfill(2)
+        ct = df['countycode'].astype(str).str.zfill(3)
+        df['fips'] = np.where(st == '00', '840', np.where(ct == '000', '000' + st, st + ct))
         df = self.get_locales(df)
         df['measure_id'] = df['measureid']
         df = df[['locale_id','measure_id','start_year','end_year','numerator','denominator','rawvalue','cilow','cihigh','chrreleaseyear','differflag','trendbreak']]
@@ -821,27 +1092,31 @@ class HealthSchema(Schema):
     def load_health(self, st_fips):
         """
         Loads Flu vaccine data to database.
-        Uses Pandas and SQLAlchemy. If the data is already in the database, it alerts the user.
+        Uses Pandas and COPY. If the data is already in the database, it alerts the user.
         """
-        urllib.request.urlretrieve('https://world-modelers.s3.amazonaws.com/data/CHR/CHR_trends_csv_2020.csv', 'CHR_trends_csv_2020.csv')
-        urllib.request.urlretrieve('https://world-modelers.s3.amazonaws.com/data/CHR/CHR_measures.csv', 'CHR_measures.csv')
+        self.download_url('https://world-modelers.s3.amazonaws.com/data/CHR/CHR_trends_csv_2020.csv', 'CHR_trends_csv_2020.csv')
+        self.download_url('https://world-modelers.s3.amazonaws.com/data/CHR/CHR_measures.csv', 'CHR_measures.csv')
         health = self.process_health_file(st_fips)
         measures = pd.read_csv("CHR_measures.csv")
         try:
-            measures.to_sql('measures', con=self.engine, schema=self.dbi.pg_schema_health, index=False, if_exists='append')
-        except IntegrityError as e:
-            assert isinstance(e.orig, UniqueViolation)
+            with self.dbi.conn.cursor() as c:
+                self.dbi.copy_df(c, measures, f'{self.dbi.pg_schema_health}.measures')
+            self.dbi.conn.commit()
+        except UniqueViolation:
+            self.dbi.conn.rollback()
             print("Health measures metadata is already loaded in LocaleDB.")
 
         try:
-            health.to_sql('health', con=self.engine, schema=self.dbi.pg_schema_health, index=False, if_exists='append')
+            with self.dbi.conn.cursor() as c:
+                self.dbi.copy_df(c, health, f'{self.dbi.pg_schema_health}.health')
+            self.dbi.conn.commit()
             print(f"Loaded health data for {st_fips} successfully.")
-        except IntegrityError as e:
-            assert isinstance(e.orig, UniqueViolation)
+        except UniqueViolation:
+            self.dbi.conn.rollback()
             print(f"Health data for {st_fips} is already loaded in LocaleDB.")
 
     def test(self):
-        with self.conn.dbi.cursor() as c:
+        with self.dbi.conn.cursor(cursor_factory=psycopg2.extras.NamedTupleCursor) as c:
             c.execute(f'SELECT COUNT(*) AS n FROM {self.dbi.pg_schema_health}.health;')
             print(c.fetchone().n)
 
@@ -954,7 +1229,7 @@ class WeatherSchema(Schema):
 
         return df
 
-    # pivot wx data from column to row
+    # pivot wx data from column to row (the missing value sentinels become NaN on the way)
     def restack_df(self, df,fn):
         if fn == "01":
             wx = "precipitation"
@@ -965,14 +1240,11 @@ class WeatherSchema(Schema):
         if fn == "28":
             wx = "Tmin"
 
-        df = pd.DataFrame(df.set_index('noaa_code').stack()).reset_index().rename(columns={'level_1': 'month', 0: wx})
-        return df
-
-    # Build full census FIPS to add to df
-    def census_fip(self, row):
-        county_fip = row.noaa_fips[-3:]
-        census_fips = row.census_state_fips + county_fip
-        return census_fips
+        vals = df[list(range(1, 13))].to_numpy(dtype=float)
+        (row_idx, month_idx) = np.nonzero(~np.isnan(vals))  # row-major like DataFrame.stack (which drops empty cells too)
+        vals = vals[row_idx, month_idx]
+        vals[(vals == -99.90) | (vals == -9.99)] = np.nan
+        return pd.DataFrame({'noaa_code': df['noaa_code'].values[row_idx], 'month': month_idx + 1, wx: vals})
 
     # Remove "County" from county name
     def format_county(self, name):
@@ -991,9 +1263,9 @@ class WeatherSchema(Schema):
         Gets FIPS lookup data
         """
         print("Downloading: FIPS lookups")
-        urllib.request.urlretrieve('https://raw.githubusercontent.com/jataware/ASKE-weather/main/noaa_to_census/noaa_fips.txt', 'noaa_fips.txt')
-        urllib.request.urlretrieve('https://raw.githubusercontent.com/jataware/ASKE-weather/main/noaa_to_census/noaa_states.txt', 'noaa_states.txt')
-        urllib.request.urlretrieve('https://raw.githubusercontent.com/jataware/ASKE-weather/main/noaa_to_census/state_fips.txt', 'state_fips.txt')
+        self.download_url('https://raw.githubusercontent.com/jataware/ASKE-weather/main/noaa_to_census/noaa_fips.txt', 'noaa_fips.txt')
+        self.download_url('https://raw.githubusercontent.com/jataware/ASKE-weather/main/noaa_to_census/noaa_states.txt', 'noaa_states.txt')
+        self.download_url('https://raw.githubusercontent.com/jataware/ASKE-weather/main/noaa_to_census/state_fips.txt', 'state_fips.txt')
         print("Downloading: NOAA data")
         files_to_download = self.download_noaa(5, 30, 60)
 
@@ -1094,9 +1366,9 @@ class WeatherSchema(Schema):
         df_aug = []
         for df in df_stack:
             df_ = df.join(noaa_fips.set_index('noaa_fips'), how='left', on='noaa_fips')
-            df_['noaa_state_fips'] = df_.noaa_fips.apply(lambda x: x[:2])
+            df_['noaa_state_fips'] = df_.noaa_fips.str[:2]
             df_ = df_.join(transformer_df, how='left', on='noaa_state_fips')
-            df_['census_county_fips'] = df_.apply(lambda row: self.census_fip(row), axis=1)
+            df_['census_county_fips'] = df_.census_state_fips + df_.noaa_fips.str[-3:]  # full census FIPS (census state and NOAA county codes)
 
             df_aug.append(df_)
 
@@ -1113,9 +1385,6 @@ class WeatherSchema(Schema):
                                  'county_name': 'county'},
                                  inplace = True)
 
-            df = df.replace(-99.90,np.NaN)
-            df = df.replace(-9.99,np.NaN)
-
             df_join.append(df)
 
         result = pd.concat(df_join, axis=1)
@@ -1129,7 +1398,7 @@ class WeatherSchema(Schema):
     def load_weather(self, start_year, stop_year):
         """
         Loads Flu vaccine data to database.
-        Uses Pandas and SQLAlchemy. If the data is already in the database, it alerts the user.
+        Uses Pandas and COPY. If the data is already in the database, it alerts the user.
         """
 
         os.chdir(self.fsi.dpath_rt)
@@ -1140,14 +1409,16 @@ class WeatherSchema(Schema):
         print(weather.head())
 
         try:
-            weather.to_sql('weather', con=self.engine, schema=self.dbi.pg_schema_weather, index=False, if_exists='append')
+            with self.dbi.conn.cursor() as c:
+                self.dbi.copy_df(c, weather, f'{self.dbi.pg_schema_weather}.weather')
+            self.dbi.conn.commit()
             print(f"Loaded weather data for {start_year} through {stop_year} successfully.")
-        except IntegrityError as e:
-            assert isinstance(e.orig, UniqueViolation)
+        except UniqueViolation:
+            self.dbi.conn.rollback()
             print(f"Weather data for {start_year} through {stop_year} is already loaded in LocaleDB.")
 
     def test(self):
-        with self.conn.dbi.cursor() as c:
+        with self.dbi.conn.cursor(cursor_factory=psycopg2.extras.NamedTupleCursor) as c:
             c.execute(f'SELECT COUNT(*) AS n FROM {self.dbi.pg_schema_weather}.weather;')
             print(c.fetchone().n)
 
@@ -1160,13 +1431,6 @@ class MobilitySchema(Schema):
     (will become stale)
     """
 
-    def add_zero(self, x):
-        # For FIPS sans leading zero
-        if len(x)<5:
-            return "0" + x
-        else:
-            return x
-
     def get_locales(self, df):
         locale_df = pd.read_sql("SELECT id, fips FROM main.locale where admin0='US'", self.engine)
         df = df.join(locale_df.set_index('fips'), how='inner', on='fips')
@@ -1174,29 +1438,19 @@ class MobilitySchema(Schema):
         del(df['fips'])
         return df
 
-
-    def stamper(self, x):
-        temp = x.split("/")
-
-        y = temp[0]
-        m = temp[1]
-        d = temp[2]
-
-        return f'{y}-{m}-{d}'
-
     def process_mobility(self, state):
         # Read in data...new version of csv
         trips_fn = 'Trips_by_Distance.csv'
         #wrkdir = os.getcwd()
 
-        df_full = pd.read_csv(trips_fn, sep=",",
-                              converters={'County FIPS': lambda x: self.add_zero(str(x))},engine='python')
+        df_full = pd.read_csv(trips_fn, sep=",", dtype={'County FIPS': str})
 
         df_full = df_full[df_full["Level"] == "County"]
 
                 # Add timestamp
         df = df_full.copy()
-        df["Timestamp"] = df.Date.apply(lambda x: self.stamper(x))
+        df["County FIPS"] = df["County FIPS"].str.zfill(5)  # for FIPS sans leading zero
+        df["Timestamp"] = df.Date.str.replace('/', '-', regex=False)
 
         # Delete unneeded columns
         delete_me = ["Level", "Date", "State FIPS"]
@@ -1210,11 +1464,8 @@ class MobilitySchema(Schema):
         if state != '-':
             df = df[df['State'] == state]
 
-        # Drop "County" from County Name
-        df["County Name"]=  df["County Name"].apply(lambda x: str(x).replace("County", "").strip())
-
         # Reorder columns
-        new_cols = ['Timestamp', 'County Name', 'State', 'County FIPS','Population Staying at Home',
+        new_cols = ['Timestamp', 'State', 'County FIPS','Population Staying at Home',
                 'Population Not Staying at Home', 'Number of Trips',
                 'Number of Trips <1', 'Number of Trips 1-3', 'Number of Trips 3-5',
                 'Number of Trips 5-10', 'Number of Trips 10-25',
@@ -1227,7 +1478,7 @@ class MobilitySchema(Schema):
         df = df.dropna()
 
         # Convert people to integers
-        cols = list(df.columns[4:])
+        cols = list(df.columns[3:])
         for col in cols:
             df[col]= df[col].astype(int)
 
@@ -1239,7 +1490,6 @@ class MobilitySchema(Schema):
                     'n_trips_100_250', 'n_trips_250_500',
                     'n_trips_gte_500']
 
-        del(df['County Name'])
         del(df['State'])
         df.columns = renamed_cols
         df = self.get_locales(df)
@@ -1248,19 +1498,21 @@ class MobilitySchema(Schema):
     def load_mobility(self, state):
         """
         Loads Flu vaccine data to database.
-        Uses Pandas and SQLAlchemy. If the data is already in the database, it alerts the user.
+        Uses Pandas and COPY. If the data is already in the database, it alerts the user.
         """
         print("Downloading mobility data...", end='', flush=True)
-        download_url = 'https://data.bts.gov/api/views/w96p-f2qv/rows.csv?accessType=DOWNLOAD'
-        urllib.request.urlretrieve(download_url, 'Trips_by_Distance.csv')
+        url = 'https://data.bts.gov/api/views/w96p-f2qv/rows.csv?accessType=DOWNLOAD'
+        self.download_url(url, 'Trips_by_Distance.csv')
         print("...done\nProcessing data...", end='', flush=True)
         mobility = self.process_mobility(state)
         print("...done\nSample:")
         print(mobility.head())
         try:
-            mobility.to_sql('mobility', con=self.engine, schema=self.dbi.pg_schema_mobility, index=False, if_exists='append')
-        except IntegrityError as e:
-            assert isinstance(e.orig, UniqueViolation)
+            with self.dbi.conn.cursor() as c:
+                self.dbi.copy_df(c, mobility, f'{self.dbi.pg_schema_mobility}.mobility')
+            self.dbi.conn.commit()
+        except UniqueViolation:
+            self.dbi.conn.rollback()
             print("Mobility data is already loaded in LocaleDB.")
 
     def select_non_null(self,row, origin_dest):
@@ -1299,9 +1551,8 @@ class MobilitySchema(Schema):
         print(df_na.head())
 
         cur = self.dbi.conn.cursor()
-        for index, row in df_na.iterrows():
-            sql = 'insert into main.locale (id, admin0, admin1) values (%s, %s, %s)'
-            cur.execute(sql, (row['locale_id'], row['admin0'], row['admin1']))
+        sql = 'insert into main.locale (id, admin0, admin1) values %s'
+        psycopg2.extras.execute_values(cur, sql, zip(df_na['locale_id'].tolist(), df_na['admin0'], df_na['admin1']), page_size=1000)
         self.dbi.conn.commit()
 
         orig_na_fixed = self.geo_merge(orig_na, df_na, 'origin')
@@ -1312,15 +1563,13 @@ class MobilitySchema(Schema):
 
         print("Updating null locales in airtraffic table...")
         cur = self.dbi.conn.cursor()
-        for index, row in orig_na_fixed.iterrows():
-            sql = 'update mobility.airtraffic set origin_locale_id = %s where id = %s'
-            cur.execute(sql, (row['origin_locale_id'], row['id']))
+        sql = 'update mobility.airtraffic a set origin_locale_id = v.locale_id from (values %s) as v (id, locale_id) where a.id = v.id'
+        psycopg2.extras.execute_values(cur, sql, zip(orig_na_fixed['id'].tolist(), orig_na_fixed['origin_locale_id'].tolist()), page_size=1000)
         self.dbi.conn.commit()
 
         cur = self.dbi.conn.cursor()
-        for index, row in dest_na_fixed.iterrows():
-            sql = 'update mobility.airtraffic set dest_locale_id = %s where id = %s'
-            cur.execute(sql, (row['dest_locale_id'], row['id']))
+        sql = 'update mobility.airtraffic a set dest_locale_id = v.locale_id from (values %s) as v (id, locale_id) where a.id = v.id'
+        psycopg2.extras.execute_values(cur, sql, zip(dest_na_fixed['id'].tolist(), dest_na_fixed['dest_locale_id'].tolist()), page_size=1000)
         self.dbi.conn.commit()
         return
 
@@ -1333,10 +1582,12 @@ class MobilitySchema(Schema):
         cmd = airtraffic.add_columns()
         self.engine.execute(cmd)
         try:
-            df.to_sql('airtraffic', con=self.engine, schema=self.dbi.pg_schema_mobility, index=False, if_exists='append')
+            with self.dbi.conn.cursor() as c:
+                self.dbi.copy_df(c, df, f'{self.dbi.pg_schema_mobility}.airtraffic')
+            self.dbi.conn.commit()  # the locale updates below are run on the engine's connection
             success = True
-        except IntegrityError as e:
-            assert isinstance(e.orig, UniqueViolation)
+        except UniqueViolation:
+            self.dbi.conn.rollback()
             print("Airtraffic data is already loaded in LocaleDB.")
             success = False
 
@@ -1359,7 +1610,7 @@ class MobilitySchema(Schema):
         self.engine.execute(cmd)
 
     def test(self):
-        with self.conn.dbi.cursor() as c:
+        with self.dbi.conn.cursor(cursor_factory=psycopg2.extras.NamedTupleCursor) as c:
             c.execute(f'SELECT COUNT(*) AS n FROM {self.dbi.pg_schema_mobility}.mobility;')
             print(c.fetchone().n)
 